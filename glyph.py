@@ -1,3 +1,6 @@
+import functools
+
+import numpy as np
 from PIL import Image, ImageChops
 
 
@@ -15,6 +18,7 @@ class Glyph:
      - :attr:`samples`, tuple of ints governing how the glyph is down-sampled for matching.
      - :attr:`fingerprint`, scaled :class:`~PIL.Image.Image` showing how glyph is internally processed.
      - :attr:`fingerprint_display`, rescaled version of :attr:`fingerprint`, to size of original :attr:`image`.
+     - :attr:`fingerprint_array`, pixel values of :attr:`fingerprint` as a flat :class:`~numpy.ndarray`.
 
     Explicitly supports summation with other glyph objects, which represent typing the two glyph atop one another.
     """
@@ -41,13 +45,36 @@ class Glyph:
 
         self.samples = samples
         self.fingerprint = self.image.convert("L").resize(samples, Image.BOX)
-        self.fingerprint_display = self.fingerprint.resize(self.image.size)
 
         if components:
             self.components = components
         else:
             self.components = [self]
 
+    @functools.cached_property
+    def fingerprint_display(self):
+        """
+        Rescaled version of :attr:`fingerprint`, to size of original :attr:`image`.
+
+        Calculated on first access, as the majority of combination glyphs are never displayed.
+
+        :return: fingerprint scaled up to the size of :attr:`image`.
+        :rtype: :class:`~PIL.Image.Image`
+        """
+        return self.fingerprint.resize(self.image.size)
+
+    @functools.cached_property
+    def fingerprint_array(self):
+        """
+        Pixel values of :attr:`fingerprint`, listed from left to right, top to bottom.
+
+        Calculated on first access, in the form used to match against image data.
+
+        :return: flat array of fingerprint pixel values, in range 0->255.
+        :rtype: :class:`~numpy.ndarray`
+        """
+        return np.asarray(self.fingerprint).ravel()
+
     def __add__(self, other):
         """
         Addition override.
@@ -1,33 +1,41 @@
+import os
 import unittest
 
+from numpy import ndarray
 from PIL import Image, ImageChops
-from typo_graphics import Glyph, Typograph
+from typo_graphics import Glyph, Typograph, package_directory
 
 
 class TestGlyph(unittest.TestCase):
 
-    def setUp(self):
+    @classmethod
+    def setUpClass(cls):
         """
         Basic set up, we make a few glyphs, keeping hold of the images and names we use
+
+        None of the tests modify these glyphs, so they are shared by the whole class
         """
 
         # Now using Typograph to provide images, as glyph images removed from source
-        typograph = Typograph()
-        self.a_image = typograph.glyphs['a'].image
-        self.a_name = 'a'
-        self.a_glyph = Glyph(name=self.a_name, image=self.a_image)
+        # Only the images are needed, so they are extracted without building any combinations
+        glyph_sheet = os.path.join(package_directory, Typograph.glyph_sheet_paths['SR100'])
+        glyph_images, _, _ = Typograph._extract_from_glyph_sheet(glyph_sheet)
+
+        cls.a_image = glyph_images['a']
+        cls.a_name = 'a'
+        cls.a_glyph = Glyph(name=cls.a_name, image=cls.a_image)
 
-        self.z_image = typograph.glyphs['z'].image
-        self.z_name = 'z'
-        self.z_glyph = Glyph(name=self.z_name, image=self.z_image)
+        cls.z_image = glyph_images['z']
+        cls.z_name = 'z'
+        cls.z_glyph = Glyph(name=cls.z_name, image=cls.z_image)
 
-        self.k_image = typograph.glyphs['k'].image
-        self.k_name = 'k'
-        self.k_glyph = Glyph(name=self.k_name, image=self.k_image, samples=(5, 8))
+        cls.k_image = glyph_images['k']
+        cls.k_name = 'k'
+        cls.k_glyph = Glyph(name=cls.k_name, image=cls.k_image, samples=(5, 8))
 
-        self.f_image = typograph.glyphs['f'].image
-        self.f_name = 'f'
-        self.f_glyph = Glyph(name=self.f_name, image=self.f_image, samples=(5, 8))
+        cls.f_image = glyph_images['f']
+        cls.f_name = 'f'
+        cls.f_glyph = Glyph(name=cls.f_name, image=cls.f_image, samples=(5, 8))
 
     def test_name(self):
         """
@@ -108,6 +116,18 @@ class TestGlyph(unittest.TestCase):
         resized_fingerprint = fingerprint.resize(self.a_image.size)
         self.assertEqual(fingerprint_display, resized_fingerprint)
 
+    def test_fingerprint_array(self):
+        """
+        Fingerprint array should be a flat array of the fingerprint pixel values
+        Listed left to right, top to bottom
+        """
+        fingerprint_array = self.a_glyph.fingerprint_array
+        self.assertIsInstance(fingerprint_array, ndarray)
+        self.assertEqual(fingerprint_array.shape, (9,))
+
+        fingerprint = self.a_glyph.fingerprint
+        self.assertListEqual(fingerprint_array.tolist(), list(fingerprint.tobytes()))
+
     def test_add(self):
         """
         When adding two glyphs,
@@ -132,12 +152,12 @@ class TestGlyph(unittest.TestCase):
         self.assertIsInstance(combined_image, Image.Image)
         self.assertEqual(combined_image, ImageChops.darker(self.a_image, self.z_image))
 
-        # components combined and sorted
+        # components combined and sorted, the original glyphs themselves are retained
         combined_components = combined_glyph.components
         self.assertEqual(len(combined_components), 2)
         first_component, second_component = combined_components
-        self.assertEqual(first_component, self.a_glyph)
-        self.assertEqual(second_component, self.z_glyph)
+        self.assertIs(first_component, self.a_glyph)
+        self.assertIs(second_component, self.z_glyph)
 
         # samples is maintained
         self.assertTupleEqual(combined_glyph.samples, self.a_glyph.samples)
@@ -7,7 +7,8 @@ from collections import namedtuple
 from string import ascii_uppercase, punctuation
 
 from PIL import Image
-from numpy import ndarray
+from numpy import ndarray, integer, issubdtype, amin, argmin, asarray
+from numpy.random import default_rng
 from scipy.spatial import cKDTree
 from scipy.special import comb
 from typo_graphics import Typograph, Glyph, package_directory
@@ -22,8 +23,17 @@ GlyphDirectory = namedtuple("GlyphDirectory", ["directory", "glyph_file_names",
 
 class TestTypograph(unittest.TestCase):
 
+    @classmethod
+    def setUpClass(cls):
+        """
+        Building a Typograph is the bulk of most tests, so one is shared by all tests that leave it unchanged
+
+        Tests that add or remove glyphs, or alter glyph images, build their own
+        """
+        cls.shared_typograph = Typograph()
+
     def setUp(self):
-        self.typograph = Typograph()
+        self.typograph = self.shared_typograph
         self.teardown_files = []
         self.teardown_dirs = []
 
@@ -87,7 +97,7 @@ class TestTypograph(unittest.TestCase):
 
         for depth in range(1, 4):
             with self.subTest(depth=depth):
-                number_of_glyphs_combinations = comb(number_of_glyphs, depth)
+                number_of_glyphs_combinations = comb(number_of_glyphs, depth, exact=True)
 
                 glyph_dict = self.typograph._combine_glyphs(depth=depth)
                 self.assertIsInstance(glyph_dict, dict)
@@ -99,6 +109,22 @@ class TestTypograph(unittest.TestCase):
                     self.assertEqual(glyph.name, name)
                     self.assertIsInstance(glyph, Glyph)
 
+    def test_combine_glyphs_from_known(self):
+        """
+        Combinations built upon known combinations should match those combined from scratch
+        """
+        glyph_images = dict(list(Typograph._extract_from_glyph_sheet(
+            os.path.join(package_directory, Typograph.glyph_sheet_paths['SR100']))[0].items())[:6])
+        typograph = Typograph(glyph_images=glyph_images, glyph_depth=2)
+
+        glyph_dict = typograph._combine_glyphs(depth=3)
+        scratch_glyph_dict = typograph._combine_glyphs(depth=3, known_combinations={})
+
+        self.assertListEqual(list(glyph_dict), list(scratch_glyph_dict))
+        for name, glyph in glyph_dict.items():
+            self.assertEqual(glyph, scratch_glyph_dict[name])
+            self.assertListEqual(glyph.components, scratch_glyph_dict[name].components)
+
     def test_tree_sets(self):
         """
         Tree sets are created
@@ -128,7 +154,7 @@ class TestTypograph(unittest.TestCase):
             stack_size = tree_index + 1
             self.assertEqual(tree_set_stack_size, stack_size)
 
-            number_of_glyphs_combinations = comb(number_of_glyphs, stack_size)
+            number_of_glyphs_combinations = comb(number_of_glyphs, stack_size, exact=True)
 
             glyph_set = tree_set_.glyph_set
             self.assertEqual(len(glyph_set), number_of_glyphs_combinations)
@@ -713,10 +739,11 @@ class TestTypograph(unittest.TestCase):
         """
         Adding the glyph to standalone glyphs
         """
+        typograph = Typograph()
         space = self.space_glyph()
-        self.typograph.add_glyph(glyph=space, use_in_combinations=False)
+        typograph.add_glyph(glyph=space, use_in_combinations=False)
 
-        standalone_glyphs = self.typograph.standalone_glyphs
+        standalone_glyphs = typograph.standalone_glyphs
         self.assertEqual(len(standalone_glyphs), 1)
         space_name = space.name
         self.assertIn(space_name, standalone_glyphs)
@@ -724,21 +751,22 @@ class TestTypograph(unittest.TestCase):
         self.assertIsInstance(standalone_glyph, Glyph)
         self.assertIs(standalone_glyph, space)
 
-        glyphs = self.typograph.glyphs
+        glyphs = typograph.glyphs
         self.assertNotIn(space_name, glyphs)
 
     def test_add_combination_glyphs(self):
         """
         Adding the glyph to glyphs
         """
+        typograph = Typograph()
         space = self.space_glyph()
-        self.typograph.add_glyph(glyph=space, use_in_combinations=True)
+        typograph.add_glyph(glyph=space, use_in_combinations=True)
         space_name = space.name
 
-        standalone_glyphs = self.typograph.standalone_glyphs
+        standalone_glyphs = typograph.standalone_glyphs
         self.assertNotIn(space_name, standalone_glyphs)
 
-        glyphs = self.typograph.glyphs
+        glyphs = typograph.glyphs
         self.assertIn(space_name, glyphs)
         entry_in_glyphs = glyphs[space_name]
         self.assertIsInstance(entry_in_glyphs, Glyph)
@@ -748,29 +776,85 @@ class TestTypograph(unittest.TestCase):
         """
         Adding glyph to standalone removes from glyphs, and vice versa
         """
+        typograph = Typograph()
         space = self.space_glyph()
         space_name = space.name
-        glyphs = self.typograph.glyphs
-        standalone_glyphs = self.typograph.standalone_glyphs
+        glyphs = typograph.glyphs
+        standalone_glyphs = typograph.standalone_glyphs
 
-        self.typograph.add_glyph(glyph=space, use_in_combinations=False)
+        typograph.add_glyph(glyph=space, use_in_combinations=False)
         self.assertIn(space_name, standalone_glyphs)
         self.assertNotIn(space_name, glyphs)
 
-        self.typograph.add_glyph(glyph=space, use_in_combinations=True)
+        typograph.add_glyph(glyph=space, use_in_combinations=True)
         self.assertIn(space_name, glyphs)
         self.assertNotIn(space_name, standalone_glyphs)
 
-        self.typograph.add_glyph(glyph=space, use_in_combinations=False)
+        typograph.add_glyph(glyph=space, use_in_combinations=False)
         self.assertIn(space_name, standalone_glyphs)
         self.assertNotIn(space_name, glyphs)
 
+    def test_add_glyph_updates_average_values(self):
+        """
+        Average values are recalculated after a glyph is added, not kept from before
+        """
+        typograph = Typograph()
+        average_values = typograph.average_values
+
+        space = self.space_glyph()
+        typograph.add_glyph(glyph=space, use_in_combinations=False)
+
+        self.assertEqual(len(typograph.average_values), len(average_values) + 1)
+        self.assertEqual(typograph.value_extrema, (min(typograph.average_values),
+                                                   max(typograph.average_values)))
+
+    def test_add_glyph_reuses_combinations(self):
+        """
+        Combination glyphs made before a glyph is added are reused, rather than combined again
+        Resulting glyph sets should match those of a Typograph built with the glyph from the start
+        """
+        typograph = Typograph()
+        previous_combinations = {glyph.name: glyph for glyph in typograph.tree_sets[1].glyph_set}
+
+        space = self.space_glyph()
+        typograph.add_glyph(glyph=space, use_in_combinations=True)
+
+        combinations = typograph.tree_sets[1].glyph_set
+        self.assertEqual(len(combinations), comb(len(typograph.glyphs), 2, exact=True))
+        for glyph in combinations:
+            if space in glyph.components:
+                self.assertNotIn(glyph.name, previous_combinations)
+            else:
+                self.assertIs(glyph, previous_combinations[glyph.name])
+
+        glyph_images = {name: glyph.image for name, glyph in typograph.glyphs.items()}
+        rebuilt = Typograph(glyph_images=glyph_images)
+        for tree_set, rebuilt_tree_set in zip(typograph.tree_sets, rebuilt.tree_sets):
+            self.assertListEqual([glyph.name for glyph in tree_set.glyph_set],
+                                 [glyph.name for glyph in rebuilt_tree_set.glyph_set])
+            self.assertListEqual(tree_set.tree.data.tolist(), rebuilt_tree_set.tree.data.tolist())
+
+    def test_add_standalone_glyph_keeps_combination_trees(self):
+        """
+        Standalone glyphs are not used in combinations, so adding one only recalculates the single glyph tree set
+        """
+        typograph = Typograph()
+        tree_sets = typograph.tree_sets
+
+        space = self.space_glyph()
+        typograph.add_glyph(glyph=space, use_in_combinations=False)
+
+        self.assertIsNot(typograph.tree_sets[0], tree_sets[0])
+        self.assertIn(space, typograph.tree_sets[0].glyph_set)
+        for tree_set, previous_tree_set in zip(typograph.tree_sets[1:], tree_sets[1:]):
+            self.assertIs(tree_set, previous_tree_set)
+
     def test_remove_standalone_glyph(self):
         """
         Glyphs can be removed from standalone using "Standalone"
         "Combinations" has no effect
         """
-        typograph = self.typograph
+        typograph = Typograph()
         space = self.space_glyph()
         space_name = space.name
         typograph.add_glyph(glyph=space, use_in_combinations=False)
@@ -787,7 +871,7 @@ class TestTypograph(unittest.TestCase):
         Glyphs can be removed from combinations using "Combinations"
         "Standalone" has no effect
         """
-        typograph = self.typograph
+        typograph = Typograph()
         space = self.space_glyph()
         space_name = space.name
         typograph.add_glyph(glyph=space, use_in_combinations=True)
@@ -803,7 +887,7 @@ class TestTypograph(unittest.TestCase):
         """
         Glyphs can be removed from either using "Both"
         """
-        typograph = self.typograph
+        typograph = Typograph()
         space = self.space_glyph()
         space_name = space.name
 
@@ -821,7 +905,7 @@ class TestTypograph(unittest.TestCase):
         """
         Glyphs can be removed by passing the glyph itself
         """
-        typograph = self.typograph
+        typograph = Typograph()
         space = self.space_glyph()
 
         typograph.add_glyph(glyph=space, use_in_combinations=False)
@@ -877,10 +961,37 @@ class TestTypograph(unittest.TestCase):
                                                    background_glyph=space, clip_limit=0)
         self.assertIn("A", preprocessed_image.getbands())
 
+    def test_preprocess_single_glyph_wide(self):
+        """
+        A target only one glyph wide cannot be equalized, so equalize_adapthist should not be used
+        Rescaling should still apply, a rescale intensity of 0 giving a flat image of the mean glyph value
+        """
+        typograph = self.typograph
+        input_image = Image.linear_gradient("L").resize((3, 60))
+        mean_value = int(sum(typograph.value_extrema) / 2)
+
+        for rescale_intensity in (0, 1):
+            with self.subTest(rescale_intensity=rescale_intensity):
+                with patch('skimage.exposure.equalize_adapthist') as mock_equalize:
+                    image = typograph._preprocess(input_image, target_size=(1, 20), clip_limit=0.02,
+                                                  enhance_contrast=True, rescale_intensity=rescale_intensity,
+                                                  background_glyph=None)
+                    mock_equalize.assert_not_called()
+
+                min_value, max_value = image.getextrema()
+                if rescale_intensity == 0:
+                    self.assertEqual(min_value, mean_value)
+                    self.assertEqual(max_value, mean_value)
+                else:
+                    min_glyph_value, max_glyph_value = typograph.value_extrema
+                    self.assertGreaterEqual(min_value, int(min_glyph_value))
+                    self.assertLessEqual(max_value, int(max_glyph_value) + 1)
+                    self.assertLess(min_value, max_value)
+
     def test_chunk(self):
         """"
         Chunk should take a list of image data, and return it in chunks
-        should return a list of lists of ints
+        should return an array of ints, one row per chunk
         chunks should correspond to input image data
         """
         image_data = [0, 0, 255, 255,
@@ -891,17 +1002,67 @@ class TestTypograph(unittest.TestCase):
         typograph = Typograph(samples=2)
         chunks = typograph._chunk(image_data=image_data, target_width=2)
 
-        self.assertIsInstance(chunks, list)
-        self.assertIsInstance(chunks[0], list)
-        self.assertIsInstance(chunks[0][0], int)
+        self.assertIsInstance(chunks, ndarray)
+        self.assertTrue(issubdtype(chunks.dtype, integer))
+
+        self.assertTupleEqual(chunks.shape, (4, 4))
+
+        self.assertListEqual(chunks[0].tolist(), [0, 0, 0, 0])
+        self.assertListEqual(chunks[1].tolist(), [255, 255, 255, 255])
+        self.assertListEqual(chunks[2].tolist(), [128, 128, 128, 128])
+        self.assertListEqual(chunks[3].tolist(), [0, 255, 128, 0])
+
+    def test_compose_output(self):
+        """
+        Output should be glyph images placed left to right, top to bottom
+        """
+
+        typograph = self.typograph
+
+        glyph_iter = iter(typograph.glyphs.values())
+        result = [next(glyph_iter), next(glyph_iter), next(glyph_iter)] * 2
+        output = typograph._compose_output(result, target_width=3, target_height=2)
+
+        self.assertIsInstance(output, Image.Image)
+        self.assertEqual(output.mode, "L")
+        self.assertTupleEqual(output.size, (3 * typograph.glyph_width, 2 * typograph.glyph_height))
+
+        for i, glyph in enumerate(result):
+            x = typograph.glyph_width * (i % 3)
+            y = typograph.glyph_height * (i // 3)
+            tile = output.crop((x, y, x + typograph.glyph_width, y + typograph.glyph_height))
+            self.assertEqual(tile.tobytes(), glyph.image.convert("L").tobytes())
+
+    def test_equalize_glyphs(self):
+        """
+        Equalizing an image should map its values onto whole valued glyph average values
+        Image should keep its size and mode
+        """
+
+        typograph = self.typograph
 
-        self.assertEqual(len(chunks), 4)
-        self.assertEqual(len(chunks[0]), 4)
+        image = Image.linear_gradient("L").resize((64, 64))
+        equalized = typograph._equalize_glyphs(image)
 
-        self.assertListEqual(chunks[0], [0, 0, 0, 0])
-        self.assertListEqual(chunks[1], [255, 255, 255, 255])
-        self.assertListEqual(chunks[2], [128, 128, 128, 128])
-        self.assertListEqual(chunks[3], [0, 255, 128, 0])
+        self.assertIsInstance(equalized, Image.Image)
+        self.assertEqual(equalized.size, image.size)
+        self.assertEqual(equalized.mode, image.mode)
+
+        whole_values = {value for value in typograph.average_values if value == int(value)}
+        self.assertTrue(set(asarray(equalized).ravel().tolist()) <= whole_values)
+
+    def test_equalize_glyphs_too_few_pixels(self):
+        """
+        An image with too few pixels to spread across the glyph values cannot be equalized
+        Should raise a ZeroDivisionError, for a flat image and for a small gradient
+        """
+
+        typograph = self.typograph
+
+        for image in (Image.new("L", (8, 8), 128), Image.linear_gradient("L").resize((3, 3))):
+            with self.subTest(size=image.size):
+                with self.assertRaises(ZeroDivisionError):
+                    typograph._equalize_glyphs(image)
 
     def test_find_closest_glyph_perfect_match(self):
         """
@@ -911,7 +1072,7 @@ class TestTypograph(unittest.TestCase):
         typograph = self.typograph
 
         target_glyph = next(iter(typograph.glyphs.values()))
-        target = target_glyph.fingerprint.getdata()
+        target = target_glyph.fingerprint_array
         closest, distance = typograph._find_closest_glyph(target=target, cutoff=0, background_glyph=None)
 
         self.assertIsInstance(closest, Glyph)
@@ -927,13 +1088,69 @@ class TestTypograph(unittest.TestCase):
 
         glyph_iter = iter(typograph.glyphs.values())
         target_glyph = next(glyph_iter) + next(glyph_iter)
-        target = target_glyph.fingerprint.getdata()
+        target = target_glyph.fingerprint_array
         closest, distance = typograph._find_closest_glyph(target=target, cutoff=0, background_glyph=None)
 
         self.assertIsInstance(closest, Glyph)
         self.assertEqual(closest, target_glyph)
         self.assertEqual(distance, 0)
 
+    def test_find_closest_glyphs(self):
+        """
+        Many targets can be matched at once, each result should match that found for the target alone
+        """
+
+        typograph = self.typograph
+
+        glyph_iter = iter(typograph.glyphs.values())
+        target_glyphs = [next(glyph_iter), next(glyph_iter) + next(glyph_iter), next(glyph_iter)]
+        targets = [target_glyph.fingerprint_array for target_glyph in target_glyphs]
+        closest, distances = typograph._find_closest_glyphs(targets=targets, cutoff=0, background_glyph=None)
+
+        self.assertIsInstance(closest, list)
+        self.assertEqual(len(closest), len(targets))
+        self.assertEqual(len(distances), len(targets))
+
+        for target, glyph, distance in zip(targets, closest, distances):
+            single_glyph, single_distance = typograph._find_closest_glyph(target=target, cutoff=0,
+                                                                          background_glyph=None)
+            self.assertIs(glyph, single_glyph)
+            self.assertEqual(distance, single_distance)
+
+        for target_glyph, glyph, distance in zip(target_glyphs, closest, distances):
+            self.assertEqual(glyph, target_glyph)
+            self.assertEqual(distance, 0)
+
+    def test_query_trees_bounded(self):
+        """
+        Without a cutoff, deeper trees are searched only for closer glyphs,
+        the closest glyph over all trees should be that found by searching each tree fully
+        """
+
+        typograph = self.typograph
+
+        targets = default_rng(0).integers(0, 256, size=(200, 9)).astype(float)
+        queries = typograph._query_trees(targets, cutoff=0)
+        full_queries = typograph._query_trees(targets, cutoff=1)
+
+        best_distances = [distances for distances, _ in queries]
+        full_distances = [distances for distances, _ in full_queries]
+        self.assertListEqual(amin(best_distances, axis=0).tolist(), amin(full_distances, axis=0).tolist())
+        self.assertListEqual(argmin(best_distances, axis=0).tolist(), argmin(full_distances, axis=0).tolist())
+
+    def test_root_mean_square_distance_many_points(self):
+        """
+        Root mean square distance of many points at once should give that of each point alone
+        """
+
+        tree_set = self.typograph.tree_sets[1]
+        points = default_rng(0).integers(0, 256, size=(5, 9)).astype(float)
+        distances = self.typograph._root_mean_square_distance(points, tree_set)
+
+        self.assertEqual(distances.shape, (len(points),))
+        for point, distance in zip(points, distances):
+            self.assertEqual(distance, self.typograph._root_mean_square_distance(point, tree_set))
+
     def test_find_closest_glyph_cutoff_1_combination_to_single(self):
         """
         With a cutoff value of 1, the matching should match a single glyph,
@@ -943,7 +1160,7 @@ class TestTypograph(unittest.TestCase):
 
         glyph_iter = iter(typograph.glyphs.values())
         target_glyph = next(glyph_iter) + next(glyph_iter)
-        target = target_glyph.fingerprint.getdata()
+        target = target_glyph.fingerprint_array
         closest, distance = typograph._find_closest_glyph(target=target, cutoff=1, background_glyph=None)
 
         self.assertIsInstance(closest, Glyph)
@@ -955,7 +1172,7 @@ class TestTypograph(unittest.TestCase):
         Adding an alpha channel, so image is fully transparent, as such, background glyph should be matched.
         """
 
-        typograph = self.typograph
+        typograph = Typograph()
 
         glyphs = iter(typograph.glyphs.values())
         target_glyph = next(glyphs)
@@ -966,7 +1183,7 @@ class TestTypograph(unittest.TestCase):
         alpha_channel = Image.new("L", target_image.size)
         target_image.putalpha(alpha_channel)
 
-        target = target_image.getdata()
+        target = asarray(target_image).reshape(-1, 2)
 
         closest, distance = typograph._find_closest_glyph(target=target, cutoff=0, background_glyph=background_glyph)
 
@@ -976,7 +1193,7 @@ class TestTypograph(unittest.TestCase):
 
     def test_background_glyph_excluded_from_main_image(self):
 
-        typograph = self.typograph
+        typograph = Typograph()
 
         glyphs = iter(typograph.glyphs.values())
         background_glyph = next(glyphs)
@@ -985,7 +1202,7 @@ class TestTypograph(unittest.TestCase):
         target_image = background_glyph.fingerprint
         alpha_channel = Image.new("L", target_image.size, "white")
         target_image.putalpha(alpha_channel)
-        target = target_image.getdata()
+        target = asarray(target_image).reshape(-1, 2)
 
         closest, distance = typograph._find_closest_glyph(target=target, cutoff=0, background_glyph=background_glyph)
 
@@ -10,7 +10,6 @@ from contextlib import suppress
 import numpy as np
 from PIL import Image
 from scipy.spatial import cKDTree
-from scipy.spatial.distance import euclidean
 from skimage import exposure
 from typo_graphics import Glyph
 
@@ -140,6 +139,7 @@ class Typograph:
         self.glyph_width, self.glyph_height = next(iter(self.glyphs.values())).image.size
         self.glyph_depth = glyph_depth
         self.standalone_glyphs = {}
+        self.tree_sets = []
         self._recalculate_glyphs()
 
     glyph_sheet_paths = {'SR100': './Glyphs/SR100.png',
@@ -389,29 +389,55 @@ class Typograph:
                 name = os.path.splitext(filename)[0]
                 name = glyph_names.get(name, name)
                 path = os.path.join(glyph_directory, filename)
-                image = Image.open(path)
-                glyph_images.update({name: image})
+                # decode once, and detach from the file, rather than holding lazy file handles
+                with Image.open(path) as image:
+                    image.load()
+                    glyph_images.update({name: image.copy()})
 
         return glyph_images
 
     # ~~ GLYPH WORK ON INIT ~~
 
-    def _calculate_trees(self):
+    def _calculate_trees(self, stack_sizes=None):
         """
         Calculate tree sets for input glyphs, combined up to `self.glyph_depth`
 
+        :param stack_sizes: stack sizes of the tree sets to calculate, the current tree sets are kept for others.
+         If omitted, all tree sets are calculated.
+        :type stack_sizes: [:class:`int`]
         :return: list of tree sets.
         :rtype: [:class:`~typograph.tree_set`]
         """
+        if stack_sizes is None:
+            stack_sizes = range(1, self.glyph_depth + 1)
+
         tree_sets = []
 
+        # combination glyphs already made are reused, so only those including a new glyph are made again
+        known_combinations = {}
+        for tree_set in self.tree_sets:
+            if tree_set.stack_size not in stack_sizes:
+                continue
+            known_combinations.update({frozenset(map(id, glyph.components)): glyph for glyph in tree_set.glyph_set})
+
         for stack_size in range(1, self.glyph_depth + 1):
-            glyph_set = list(self._combine_glyphs(stack_size).values())
+            if stack_size not in stack_sizes:
+                tree_sets.append(self.tree_sets[stack_size - 1])
+                continue
+
+            combinations = self._combine_glyphs(stack_size, known_combinations=known_combinations)
+            # the next stack size can build upon these
+            known_combinations.update({frozenset(map(id, glyph.components)): glyph for glyph in combinations.values()})
+            glyph_set = list(combinations.values())
 
             if stack_size == 1:
                 glyph_set.extend(list(self.standalone_glyphs.values()))
 
-            glyph_data = [list(glyph.fingerprint.getdata()) for glyph in glyph_set]
+            # one contiguous array, rather than a list of lists that cKDTree and numpy must each copy
+            # fingerprints are all "L" mode, so their raw bytes join directly into rows of pixel values
+            fingerprint_bytes = b''.join(glyph.fingerprint.tobytes() for glyph in glyph_set)
+            glyph_data = np.frombuffer(fingerprint_bytes, dtype=np.uint8).reshape(len(glyph_set), -1).astype(float)
+            # default construction is kept, other tree layouts can pick a different glyph of equal distance
             tree = cKDTree(glyph_data)
             centroid = np.mean(glyph_data, axis=0)
             mean_square_from_centroid = np.mean(((glyph_data - centroid) ** 2).sum(axis=1))
@@ -422,19 +448,33 @@ class Typograph:
 
         return tree_sets
 
-    def _combine_glyphs(self, depth):
+    def _combine_glyphs(self, depth, known_combinations=None):
         """
         Calculate all unique combinations of `depth` number of glyphs.
 
         :param depth: number of glyphs to combine into composite glyphs.
         :type depth: :class:`int`
+        :param known_combinations: combination glyphs to use rather than combining again,
+         keyed by the set of ids of their component glyphs. If omitted, those in `self.tree_sets` are used.
+        :type known_combinations: {:class:`frozenset`: :class:`Glyph`}
         :return: dictionary of combination glyphs, using glyph names as keys.
         :rtype: :class:`dict`
         """
+        if known_combinations is None:
+            known_combinations = {frozenset(map(id, glyph.components)): glyph
+                                  for tree_set in self.tree_sets for glyph in tree_set.glyph_set}
+
         glyph_combinations = itertools.combinations(iter(self.glyphs.values()), depth)
         output = {}
         for combination in glyph_combinations:
-            new = functools.reduce(operator.add, combination)
+            new = known_combinations.get(frozenset(map(id, combination)))
+            if new is None:
+                # glyphs are added in order, so a known combination of all but the last is a head start
+                start = known_combinations.get(frozenset(map(id, combination[:-1])))
+                if start is not None:
+                    new = start + combination[-1]
+                else:
+                    new = functools.reduce(operator.add, combination)
             output.update({new.name: new})
         return output
 
@@ -445,13 +485,9 @@ class Typograph:
         :return: list of average pixel values, no given order.
         :rtype: [:class:`float`]
         """
-        average_values = []
-        for tree_set in self.tree_sets:
-            for glyph in tree_set.glyph_set:
-                values = list(glyph.fingerprint.getdata())
-                average_value = sum(values) / len(values)
-                average_values.append(average_value)
-        return average_values
+        # the trees already hold every fingerprint, one per row
+        average_values = np.concatenate([tree_set.tree.data.mean(axis=1) for tree_set in self.tree_sets])
+        return average_values.tolist()
 
     def _glyph_value_extrema(self):
         """
@@ -462,7 +498,31 @@ class Typograph:
         """
         return min(self.average_values), max(self.average_values)
 
-    def _recalculate_glyphs(self):
+    @functools.cached_property
+    def average_values(self):
+        """
+        Average pixel values for all glyphs in `self.tree_sets`.
+
+        Calculated on first use after glyphs change, see :meth:`~Typograph._average_glyph_values`.
+
+        :return: list of average pixel values, no given order.
+        :rtype: [:class:`float`]
+        """
+        return self._average_glyph_values()
+
+    @functools.cached_property
+    def value_extrema(self):
+        """
+        Extrema of average pixel values for all glyphs.
+
+        Calculated on first use after glyphs change, see :meth:`~Typograph._glyph_value_extrema`.
+
+        :return: tuple of (min, max) pixel values.
+        :rtype: (:class:`float`, :class:`float`)
+        """
+        return self._glyph_value_extrema()
+
+    def _recalculate_glyphs(self, combinations_changed=True):
         """
         Update glyph relevant attributes, for use whenever glyphs are changed.
 
@@ -470,11 +530,17 @@ class Typograph:
         :attr:`~Typograph.tree_sets`
         :attr:`~Typograph.average_values`
         :attr:`~Typograph.value_extrema`
+
+        :param combinations_changed: whether glyphs used in combinations changed,
+         if not, only standalone glyphs did, and only the single glyph tree set is recalculated.
+        :type combinations_changed: :class:`bool`
         """
-        # Will be recalculating all trees, not just the ones affected
-        self.tree_sets = self._calculate_trees()
-        self.average_values = self._average_glyph_values()
-        self.value_extrema = self._glyph_value_extrema()
+        # standalone glyphs are only ever used alone, so appear in no other tree sets
+        stack_sizes = None if combinations_changed else [1]
+        self.tree_sets = self._calculate_trees(stack_sizes=stack_sizes)
+        # values derived from the trees are calculated again when next used
+        self.__dict__.pop('average_values', None)
+        self.__dict__.pop('value_extrema', None)
 
     def add_glyph(self, glyph, use_in_combinations=False):
         """
@@ -493,11 +559,12 @@ class Typograph:
         if use_in_combinations:
             self.standalone_glyphs.pop(glyph.name, None)
             self.glyphs.update({glyph.name: glyph})
+            combinations_changed = True
         else:
-            self.glyphs.pop(glyph.name, None)
+            combinations_changed = self.glyphs.pop(glyph.name, None) is not None
             self.standalone_glyphs.update({glyph.name: glyph})
 
-        self._recalculate_glyphs()
+        self._recalculate_glyphs(combinations_changed=combinations_changed)
 
     def remove_glyph(self, glyph, remove_from="Both"):
         """
@@ -532,7 +599,7 @@ class Typograph:
         if remove_from in ("both", "b", "standalone", "s"):
             from_standalone = self.standalone_glyphs.pop(glyph, None)
 
-        self._recalculate_glyphs()
+        self._recalculate_glyphs(combinations_changed=from_combination is not None)
 
         return from_combination or from_standalone
 
@@ -648,10 +715,13 @@ class Typograph:
                 alpha_channel = Image.new("L", image.size, "white")
         greyscale_image = image.convert("L")
 
+        # equalize_adapthist needs more than one glyph in each direction to work with
+        equalize = enhance_contrast and min(target_size) > 1
+
         if enhance_contrast or rescale_intensity:
             image_array = np.asarray(greyscale_image)
 
-            if min(target_size) > 1 and enhance_contrast:
+            if equalize:
                 image_array = exposure.equalize_adapthist(image_array, clip_limit=clip_limit)
 
             if rescale_intensity is not None:
@@ -667,7 +737,11 @@ class Typograph:
 
                 image_array = exposure.rescale_intensity(image_array, out_range=out_range)
 
-            greyscale_image = Image.fromarray(image_array.astype("uint8"))
+            if image_array.dtype != np.uint8:
+                # clip explicitly, casting out of range floats to uint8 would otherwise wrap around
+                image_array = np.clip(image_array, 0, 255).astype(np.uint8)
+
+            greyscale_image = Image.fromarray(image_array)
 
         if background_glyph is not None:
             greyscale_image.putalpha(alpha_channel)
@@ -678,24 +752,24 @@ class Typograph:
         Separate `image_data` into chunks, according to :attr:`~Glyph.sample_x` and :attr:`~Glyph.self.sample_y`.
 
         Working from left to right, top to bottom of data representing an input image,
-        produces lists of data corresponding to a region of the full image
+        produces rows of data corresponding to a region of the full image
         that are :attr:`~Glyph.sample_x` by :attr:`~Glyph.sample_y` in size.
 
-        :param image_data: list of image data specifying pixel values in range 0->255.
-        :type image_data: [:class:`int`]
+        :param image_data: list or array of image data specifying pixel values in range 0->255.
+        :type image_data: [:class:`int`] or :class:`~numpy.ndarray`
         :param target_width: width of target image as measured in glyphs.
         :type target_width: :class:`int`
-        :return: list of chunks, each of which are a list of integer values from source `image_data`.
-        :rtype: [[:class:`int`]]
+        :return: array of chunks, one row per chunk, each holding the integer values from source `image_data`.
+        :rtype: :class:`~numpy.ndarray`
         """
-        chunks = []
+        image_data = np.asarray(image_data)
+        bands = image_data.shape[1:]  # pixels may carry more than one value, such as an alpha
         height = len(image_data) // (target_width * self.sample_y * self.sample_x)
-        for y in range(height):
-            rows = range(self.sample_y * y, self.sample_y * (y + 1))
-            for x in range(target_width):
-                columns = range(self.sample_x * x, self.sample_x * (x + 1))
-                chunk = [image_data[column + row * target_width * self.sample_x] for row in rows for column in columns]
-                chunks.append(chunk)
+        image_data = image_data[:height * self.sample_y * target_width * self.sample_x]
+
+        # split into rows of glyphs, then bring the samples of each glyph together
+        glyph_rows = image_data.reshape(height, self.sample_y, target_width, self.sample_x, *bands)
+        chunks = glyph_rows.swapaxes(1, 2).reshape(height * target_width, self.sample_y * self.sample_x, *bands)
         return chunks
 
     # ~~ OUTPUT CREATION ~~
@@ -709,23 +783,24 @@ class Typograph:
         :type image: :class:`~PIL.Image.Image`
         :return: input image adjusted to glyph histogram.
         :rtype: :class:`~PIL.Image.Image`
+        :raises ZeroDivisionError: if image has too few pixels outside its highest value to spread across glyph values.
         """
-        h = image.histogram()
-        target_indices = []
-        for i in range(256):
-            count = self.average_values.count(i)
-            if count:
-                target_indices.extend([i] * count)
-
-        histo = [_f for _f in h if _f]
-        step = (functools.reduce(operator.add, histo) - histo[-1]) // len(target_indices)
-
-        lut = []
-        n = step // 2
-        for i in range(256):
-            position = min(n // step, len(target_indices) - 1)
-            lut.append(target_indices[position])
-            n += h[i]
+        h = np.array(image.histogram())
+        # only averages of whole values are counted, as each is a count of its exact value
+        values = np.asarray(self.average_values)
+        whole_values = values[values == np.round(values)].astype(int)
+        target_indices = np.repeat(np.arange(256), np.bincount(whole_values, minlength=256)[:256])
+
+        histo = h[h.nonzero()]
+        step = int(histo.sum() - histo[-1]) // len(target_indices)
+        if step == 0:
+            # dividing the array of counts by zero would only warn, so fail as integer division of the counts did
+            raise ZeroDivisionError("image has too few pixels to spread across glyph values")
+
+        # running count of pixels below each value, offset by half a step
+        n = step // 2 + np.concatenate(([0], np.cumsum(h[:255])))
+        positions = np.minimum(n // step, len(target_indices) - 1)
+        lut = target_indices[positions].tolist()
 
         return image.point(lut)
 
@@ -738,6 +813,8 @@ class Typograph:
         A value of 0.0 will permit no substitutions, always using the best glyph.
         Higher values will allow less similar glyphs to be used, if they comprise of fewer component pieces.
 
+        Single target form of :meth:`~Typograph._find_closest_glyphs`.
+
         :param target: data of target region of image, given as a list of integers,
          range 0->255 listed from left to right, top to bottom.
         :type target: [:class:`int`]
@@ -749,48 +826,142 @@ class Typograph:
          Distance is given as Euclidian distance in :attr:`~Glyph.sample_x` * :attr:`~Glyph.sample_y` dimensional value space.
         :rtype: (:class:`Glyph`, :class:`float`)
         """
-        # TODO: may want to easy out if we're at glyph depth of 1?
+        glyphs, distances = self._find_closest_glyphs([list(target)], cutoff=cutoff,
+                                                      background_glyph=background_glyph)
+        return glyphs[0], distances[0]
 
-        background_distance = None
+    def _find_closest_glyphs(self, targets, cutoff, background_glyph):
+        """
+        Determine closest glyphs available to each of `targets`.
 
-        if background_glyph is not None:
-            is_transparent = [alpha < 255 for value, alpha in target]
-            if all(is_transparent):  # if deemed transparent enough
-                return background_glyph, None  # using None for distance
-            elif any(is_transparent):  # some transparency, merge in background glyph
-                background = background_glyph.fingerprint.getdata()
-                target = [(target_value * alpha/255) + (back_value * (255 - alpha)/255)
-                          for back_value, (target_value, alpha) in zip(background, target)]
-                background_distance = euclidean(background, target)
-            else:  # otherwise strip alpha, continue as normal
-                target = [value for value, alpha in target]
-
-        neighbours = []
-        for tree_set in self.tree_sets:
-            tree = tree_set.tree
-            distance, index = tree.query(target)
-            neighbours.append((tree_set, distance, index))
+        Each tree is queried once with all distinct targets, rather than once per target,
+        with `cutoff` and `background_glyph` then applied as for :meth:`~Typograph._find_closest_glyph`.
+
+        :param targets: data of target regions of image, one row per region,
+         each given as for `target` in :meth:`~Typograph._find_closest_glyph`.
+        :type targets: [[:class:`int`]]
+        :param cutoff: value used to determine replacement with a
+         simpler glyph that is not quite as good a match to target.
+        :type cutoff: :class:`float`
+        :param background_glyph: glyph to use for transparent targets, targets then include alpha values.
+        :type background_glyph: :class:`Glyph`
+        :return: tuple of list of best matched :class:`Glyph` for each target,
+         and list of distances between each target and said glyph, ``None`` where the target was transparent.
+        :rtype: ([:class:`Glyph`], [:class:`float`])
+        """
+        targets = np.asarray(targets, dtype=float)
+        # areas of flat colour give many identical targets, so each distinct target is only matched once
+        # rows are compared as raw bytes, which numpy sorts far faster than it does rows of floats
+        target_rows = np.ascontiguousarray(targets.reshape(len(targets), -1))
+        target_rows = target_rows.view(np.dtype((np.void, target_rows.itemsize * target_rows.shape[1])))
+        _, first_indices, target_indices = np.unique(target_rows.reshape(-1), return_index=True, return_inverse=True)
+        targets = targets[first_indices]
+        transparent = np.zeros(len(targets), dtype=bool)
+        partial = np.zeros(len(targets), dtype=bool)
 
-        best_tree_set, best_distance, best_index = min(neighbours, key=lambda x: x[1])
-        best_glyph = best_tree_set.glyph_set[best_index]
+        if background_glyph is not None:
+            values, alpha = targets[..., 0], targets[..., 1]
+            is_transparent = alpha < 255
+            transparent = is_transparent.all(axis=1)  # if deemed transparent enough
+            partial = is_transparent.any(axis=1) & ~transparent  # some transparency, merge in background glyph
+            if partial.any():
+                background = background_glyph.fingerprint_array
+                merged = (values * alpha / 255) + (background * (255 - alpha) / 255)
+                values = np.where(partial[:, np.newaxis], merged, values)
+            # otherwise strip alpha, continue as normal
+            targets = values
+
+        # transparent targets take the background glyph, so only the rest are searched for
+        searched_targets = targets[~transparent]
+        queries = self._query_trees(searched_targets, cutoff=cutoff)
+
+        # one row per tree set, one column per searched target
+        tree_distances = np.array([distance for distance, _ in queries]).reshape(len(queries), -1)
+        tree_indices = np.array([index for _, index in queries]).reshape(len(queries), -1)
+
+        # argmin takes the first of equal distances, favouring fewer stacked glyphs
+        searched = np.arange(tree_distances.shape[1])
+        best_trees = tree_distances.argmin(axis=0)
+        best_distances = tree_distances[best_trees, searched]
+        best_indices = tree_indices[best_trees, searched]
 
         # We permit background glyph use in semi-transparent areas, if best match
-        if background_distance is not None:
-            if background_distance < best_distance:
-                best_distance = background_distance
-                best_glyph = background_glyph
+        on_background = np.zeros(len(searched), dtype=bool)
+        searched_partial = np.flatnonzero(partial[~transparent])
+        if len(searched_partial):
+            background_distances = np.linalg.norm(searched_targets[searched_partial] - background, axis=1)
+            closer = background_distances < best_distances[searched_partial]
+            on_background[searched_partial[closer]] = True
+            best_distances[searched_partial[closer]] = background_distances[closer]
+
+        # The ratio compared against cutoff is never negative, so only a positive cutoff can swap glyphs
+        # and a single tree set, as at glyph depth of 1, has no simpler glyphs to swap to
+        if cutoff > 0 and len(self.tree_sets) > 1:
+            stack_sizes = np.array([tree_set.stack_size for tree_set in self.tree_sets])[:, np.newaxis]
+            stack_size_diffs = stack_sizes[best_trees, 0] - stack_sizes
+            rmds = np.array([self._root_mean_square_distance(searched_targets, tree_set)
+                             for tree_set in self.tree_sets]).reshape(len(self.tree_sets), -1)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ratios = (tree_distances - best_distances) / (stack_size_diffs * rmds)
+            # only tree sets holding fewer stacked glyphs than the best, the first of which is used
+            swaps = (stack_size_diffs > 0) & (ratios < cutoff)
+            swapped = swaps.any(axis=0)
+            swap_trees = swaps.argmax(axis=0)
+            best_trees = np.where(swapped, swap_trees, best_trees)
+            best_distances = np.where(swapped, tree_distances[swap_trees, searched], best_distances)
+            best_indices = np.where(swapped, tree_indices[swap_trees, searched], best_indices)
+            on_background &= ~swapped
+
+        # transparent targets keep the background glyph, using None for distance
+        glyphs = [background_glyph] * len(targets)
+        distances = [None] * len(targets)
+        for row, i in enumerate(np.flatnonzero(~transparent)):
+            if on_background[row]:
+                glyphs[i] = background_glyph
+            else:
+                glyphs[i] = self.tree_sets[best_trees[row]].glyph_set[best_indices[row]]
+            distances[i] = best_distances[row]
+
+        return [glyphs[i] for i in target_indices], [distances[i] for i in target_indices]
+
+    def _query_trees(self, targets, cutoff):
+        """
+        Find the nearest glyph in each of `self.tree_sets` to each of `targets`.
 
-        max_stack_size = best_tree_set.stack_size
+        Without a positive `cutoff`, only the closest glyph across all trees is ever used.
+        Each tree after the first is then only searched for glyphs closer than the best found so far,
+        with targets grouped by that distance to bound the search. Glyphs not within the bound are
+        given with infinite distance, and an index one past the end of the glyph set.
 
-        for tree_set, distance, index in neighbours[:max_stack_size-1]:
+        :param targets: data of target regions of image, one row per region.
+        :type targets: :class:`~numpy.ndarray`
+        :param cutoff: value used to determine replacement with a
+         simpler glyph that is not quite as good a match to target.
+        :type cutoff: :class:`float`
+        :return: list of tuples of distances and indices, as given by :meth:`~scipy.spatial.cKDTree.query`,
+         one per tree set.
+        :rtype: [(:class:`~numpy.ndarray`, :class:`~numpy.ndarray`)]
+        """
+        # queries are spread over all available cores, as the tree releases the GIL while searching
+        if cutoff > 0:
+            return [tree_set.tree.query(targets, workers=-1) for tree_set in self.tree_sets]
 
-            distance_diff = distance - best_distance
-            stack_size_diff = best_tree_set.stack_size - tree_set.stack_size
-            rmd = self._root_mean_square_distance(target, tree_set)
-            if (distance_diff / (stack_size_diff * rmd)) < cutoff:
-                return tree_set.glyph_set[index], distance
+        queries = []
+        best_distances = np.full(len(targets), np.inf)
+        for tree_set in self.tree_sets:
+            distances = np.empty(len(targets))
+            indices = np.empty(len(targets), dtype=np.intp)
 
-        return best_glyph, best_distance
+            for group in np.array_split(np.argsort(best_distances), 4):
+                # slight margin, so a glyph only just closer than the bound isn't lost to rounding
+                bound = best_distances[group].max(initial=0) * (1 + 1e-9)
+                distances[group], indices[group] = tree_set.tree.query(targets[group], distance_upper_bound=bound,
+                                                                       workers=-1)
+
+            best_distances = np.minimum(best_distances, distances)
+            queries.append((distances, indices))
+
+        return queries
 
     def _compose_calculation(self, result, target_width, target_height):
         """
@@ -807,12 +978,7 @@ class Typograph:
         :return: a :class:`~PIL.Image.Image` comprised of glyph :attr:`~Glyph.fingerprint_display` images.
         :rtype: :class:`~PIL.Image.Image`
         """
-        calculation = Image.new("L", (target_width * self.glyph_width, target_height * self.glyph_height))
-        for i, glyph_ in enumerate(result):
-            x = self.glyph_width * (i % target_width)
-            y = self.glyph_height * (i // target_width)
-            calculation.paste(glyph_.fingerprint_display, (x, y, x + self.glyph_width, y + self.glyph_height))
-        return calculation
+        return self._tile_images([glyph_.fingerprint_display for glyph_ in result], target_width, target_height)
 
     def _compose_output(self, result, target_width, target_height):
         """
@@ -831,12 +997,35 @@ class Typograph:
          representing final output of conversion from image to glyphs.
         :rtype: :class:`~PIL.Image.Image`
         """
-        output = Image.new("L", (target_width * self.glyph_width, target_height * self.glyph_height))
-        for i, glyph_ in enumerate(result):
-            x = self.glyph_width * (i % target_width)
-            y = self.glyph_height * (i // target_width)
-            output.paste(glyph_.image, (x, y, x + self.glyph_width, y + self.glyph_height))
-        return output
+        return self._tile_images([glyph_.image for glyph_ in result], target_width, target_height)
+
+    def _tile_images(self, images, target_width, target_height):
+        """
+        Compose glyph sized images into a single "L" mode image, placed left to right, top to bottom.
+
+        :param images: list of :class:`~PIL.Image.Image`, each of glyph dimensions.
+        :type images: [:class:`~PIL.Image.Image`]
+        :param target_width: number of images across.
+        :type target_width: :class:`int`
+        :param target_height: number of images down.
+        :type target_height: :class:`int`
+        :return: a :class:`~PIL.Image.Image` comprised of `images`.
+        :rtype: :class:`~PIL.Image.Image`
+        """
+        # results repeat few distinct glyphs, so each image is converted once, then gathered by index
+        positions = {}
+        tile_data = []
+        tile_indices = []
+        for image in images:
+            if id(image) not in positions:
+                positions[id(image)] = len(tile_data)
+                tile_data.append(np.asarray(image.convert("L")))
+            tile_indices.append(positions[id(image)])
+
+        tiles = np.stack(tile_data)[np.reshape(tile_indices, (target_height, target_width))]
+        # (rows, columns, glyph_height, glyph_width) to rows of pixels
+        tiles = tiles.swapaxes(1, 2).reshape(target_height * self.glyph_height, target_width * self.glyph_width)
+        return Image.fromarray(tiles)
 
     def _instructions(self, result_glyphs, spacer, target_width, target_height, trailing_spacer=False):
         """
@@ -894,7 +1083,7 @@ class Typograph:
             row_letters = self._iter_all_strings()
 
             for row_number, row in enumerate(rows):
-                glyph_groups = itertools.groupby(row, key=lambda glyph: glyph.name)
+                glyph_groups = itertools.groupby(row, key=operator.attrgetter('name'))
                 glyph_groups = [(key, list(group)) for key, group in glyph_groups]
 
                 if not trailing_spacer:
@@ -902,7 +1091,7 @@ class Typograph:
                     if glyph_groups[-1][1][0] == spacer:
                         glyph_groups = glyph_groups[:-1]
 
-                groups = [str(len(list(group))) + key for key, group in glyph_groups]
+                groups = [str(len(group)) + key for key, group in glyph_groups]
 
                 if len(rows) > 1:
                     row_letter = next(row_letters)
@@ -931,15 +1120,16 @@ class Typograph:
         * :math:`x_i` is a point of the set
         * :math:`a` is target point
 
-        :param array_like point: point from which mean square distance is calculated.
+        :param array_like point: point from which mean square distance is calculated,
+         or array of points, one per row.
         :param tree_set: :class:`~typo_graphics.typograph.TreeSet` to be compared against, contains centroid and mean square from centroid.
         :type tree_set: :class:`~typo_graphics.typograph.TreeSet`
-        :return: root mean square distance of point from points given by `tree_set`.
-        :rtype: :class:`float`
+        :return: root mean square distance of point from points given by `tree_set`, one per row for many points.
+        :rtype: :class:`float` or :class:`~numpy.ndarray`
         """
         centroid = tree_set.centroid
         mean_square_from_centroid = tree_set.mean_square_from_centroid
-        square_distance_from_centroid = ((np.array(point) - centroid) ** 2).sum()
+        square_distance_from_centroid = ((np.asarray(point) - centroid) ** 2).sum(axis=-1)
         return np.sqrt(square_distance_from_centroid + mean_square_from_centroid)
 
     @staticmethod
@@ -1033,13 +1223,11 @@ class Typograph:
         :rtype: :class:`~typo_graphics.typograph.TypedArt`
         """
         target_width, target_height = target_size
-        image_data = list(image.getdata())
+        image_data = np.asarray(image)
+        image_data = image_data.reshape(-1, *image_data.shape[2:])  # flat list of pixels, keeping any alpha
         target_parts = self._chunk(image_data, target_width=target_width)
 
-        result = []
-        for section in target_parts:
-            glyph, distance = self._find_closest_glyph(section, cutoff=cutoff, background_glyph=background_glyph)
-            result.append(glyph)
+        result, _ = self._find_closest_glyphs(target_parts, cutoff=cutoff, background_glyph=background_glyph)
 
         calculation = self._compose_calculation(result, target_width=target_width, target_height=target_height)
         output = self._compose_output(result, target_width=target_width, target_height=target_height)